@@ -1,12 +1,20 @@
+import asyncio
+import itertools
 import json
 import filecmp
 from pathlib import Path
 import shutil
+import socket
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
 
 ROOT = Path(__file__).resolve().parents[1]
 PY = sys.executable
+sys.path.insert(0, str(ROOT))
 
 def run_case(name):
     case_dir = ROOT / "tests" / name
@@ -42,9 +50,118 @@ def run_case(name):
     print(f"[{name}] {'Success' if ok else 'FAIL'}")
     return ok
 
+def check_scan_order():
+    """Earliest-scan choice must not depend on the order scans arrive in."""
+    from src.reconcile import LogAggregate
+    lines = ["A-1,Weevo,bad", "A-1,Bosta,2025-08-12 10:00", "A-1,Aramex,2025-08-12 10:00",
+             "B-2,Weevo,bad", "B-2,Bosta,also bad", "C-3,Weevo,2025-08-12 09:00"]
+    results = set()
+    for perm in itertools.permutations(lines):
+        agg = LogAggregate()
+        agg.add_lines(perm)
+        results.add(json.dumps(agg.scans, default=str, sort_keys=True))
+    return len(results) == 1 and json.loads(results.pop())["A-1"][2] == "ARAMEX"
+
+def check_slot_split():
+    """Splitting an order over slots must only use real slots, also when leftovers are tiny."""
+    from datetime import datetime
+    from src.slots import CourierSlots
+    slots = [(datetime(2025, 8, 12, h), datetime(2025, 8, 12, h + 1), 1.0) for h in range(4)]
+    cs = CourierSlots(slots)
+    cs.take([(i, 1.0 - 5e-7) for i in range(4)])
+    alloc = cs.find(None, 1.5e-6)
+    ok = alloc is not None and all(0 <= i < 4 for i, _ in alloc)
+    ok &= abs(sum(w for _, w in alloc) - 1.5e-6) < 1e-12
+    ok &= cs.find(None, 3e-6) is None
+    cs = CourierSlots(slots)
+    ok &= cs.find(datetime(2025, 8, 12, 2), 2.5) == [(0, 1.0), (1, 1.0), (2, 0.5)]
+    return ok
+
+def check_ingest_sources():
+    """Tailed file and socket feeds, both with a line split across writes, through a tiny queue."""
+    from src.ingest import ingest
+    tmp = Path(tempfile.mkdtemp())
+    grow = tmp / "grow.csv"
+    bulk = tmp / "bulk.csv"
+    bulk.write_text("".join(f"BULK-{i},Bosta,2025-08-12 10:00\n" for i in range(20000)), encoding="utf-8")
+    port = {}
+
+    def writer():
+        with grow.open("w", encoding="utf-8") as f:
+            f.write("T-1,Weevo,2025-08-12 10:00\nT-2,Weevo,2025-08-12 1")
+            f.flush()
+            time.sleep(0.2)
+            f.write("1:30\n")
+            f.flush()
+
+    def pusher():
+        deadline = time.monotonic() + 5
+        while "p" not in port:
+            if time.monotonic() > deadline:
+                return  # server never bound; the row counts below fail the check
+            time.sleep(0.01)
+        with socket.create_connection(("127.0.0.1", port["p"])) as s:
+            s.sendall(b"S-1,Bosta,2025-08-12 12:00\nS-2,Bos")
+            time.sleep(0.2)
+            s.sendall(b"ta,2025-08-12 12:15\n")
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=pusher)]
+    for t in threads:
+        t.start()
+    sources = [{"kind": "tail", "path": grow}, {"kind": "file", "path": bulk},
+               {"kind": "socket", "host": "127.0.0.1", "port": 0,
+                "on_ready": lambda p: port.__setitem__("p", p)}]
+    agg, report = asyncio.run(ingest(sources, queue_size=1, idle_timeout=0.5))
+    for t in threads:
+        t.join()
+    shutil.rmtree(tmp)
+
+    scans = agg.scans
+    ok = len(scans) == 20004
+    ok &= scans.get("T-2", [None, None])[1] == datetime(2025, 8, 12, 11, 30)
+    ok &= scans.get("S-2", [None, None, None])[1:] == [datetime(2025, 8, 12, 12, 15), "BOSTA"]
+    rows = {r["kind"]: r for r in report}
+    ok &= rows["tail"]["rows"] == 2 and rows["socket"]["rows"] == 2 and rows["file"]["rows"] == 20000
+    ok &= rows["socket"]["source"] == f"socket:127.0.0.1:{port.get('p')}"
+    if not ok:
+        print(json.dumps(report, indent=2))
+    return ok
+
+def check_consumer_failure():
+    """A consumer that raises must fail ingest() instead of leaving producers blocked on a full queue."""
+    from src.ingest import ingest
+    from src.reconcile import LogAggregate
+
+    class Failing(LogAggregate):
+        def add_lines(self, lines):
+            raise ValueError("consumer failed")
+
+    tmp = Path(tempfile.mkdtemp())
+    bulk = tmp / "bulk.csv"
+    bulk.write_text("".join(f"BULK-{i},Bosta,2025-08-12 10:00\n" for i in range(20000)), encoding="utf-8")
+    sources = [{"kind": "file", "path": bulk}] * 3
+    try:
+        asyncio.run(asyncio.wait_for(ingest(sources, aggregate=Failing(), queue_size=1), timeout=10))
+        ok = False
+    except ValueError:
+        ok = True
+    except asyncio.TimeoutError:
+        ok = False
+    shutil.rmtree(tmp)
+    return ok
+
+def run_check(name, fn):
+    ok = fn()
+    print(f"[{name}] {'Success' if ok else 'FAIL'}")
+    return ok
+
 def main():
     all_ok = True
-    for name in ["test1","test2","test3","test4"]:
+    all_ok &= run_check("slot_split", check_slot_split)
+    all_ok &= run_check("scan_order", check_scan_order)
+    all_ok &= run_check("ingest_sources", check_ingest_sources)
+    all_ok &= run_check("consumer_failure", check_consumer_failure)
+    for name in ["test1","test2","test3","test4","test5","test6","test7","test8","test9","test10"]:
         all_ok &= run_case(name)
     sys.exit(0 if all_ok else 1)
 
@@ -0,0 +1,176 @@
+# src/ingest.py
+
+import asyncio
+import time
+from pathlib import Path
+from .reconcile import LogAggregate
+
+# size hint (bytes) for each read from a file or socket
+READ_CHUNK_BYTES = 1 << 16
+
+def directory_sources(path: Path):
+    """One `file` source per *.csv in `path` (e.g. one scan feed per courier), sorted by name."""
+    return [{"kind": "file", "path": p} for p in sorted(Path(path).glob("*.csv"))]
+
+def _source_name(src):
+    if src["kind"] == "socket":
+        return f"socket:{src['host']}:{src['port']}"
+    return f"{src['kind']}:{src['path']}"
+
+class _SourceStats:
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.rows = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+        self.finished = None
+        self.consumed = None
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def report(self):
+        # until the source is done AND its last batch has been folded into the aggregate
+        elapsed = max(self.finished or time.monotonic(), self.consumed or 0.0) - self.started
+        return {
+            "source": self.name,
+            "kind": self.kind,
+            "rows": self.rows,
+            "skipped": self.skipped,
+            "seconds": round(elapsed, 3),
+            "rowsPerSec": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+            "lagMsAvg": round(1000 * self.lag_total / self.rows, 3) if self.rows else None,
+            "lagMsMax": round(1000 * self.lag_max, 3)
+        }
+
+async def _put_lines(queue, stats, lines):
+    # blocks while the queue is full -> producers slow down to the consumer's pace
+    if lines:
+        await queue.put((stats, time.monotonic(), lines))
+
+async def _read_file(src, queue, stats, opts):
+    with open(src["path"], "r", encoding="utf-8") as f:
+        while True:
+            lines = await asyncio.to_thread(f.readlines, READ_CHUNK_BYTES)
+            if not lines:
+                break
+            await _put_lines(queue, stats, lines)
+
+async def _tail_file(src, queue, stats, opts):
+    """Follow a growing file until it has been idle for `idle_timeout` seconds."""
+    path = Path(src["path"])
+    last_data = time.monotonic()
+    while not path.exists():
+        if time.monotonic() - last_data > opts["idle_timeout"]:
+            return
+        await asyncio.sleep(opts["poll_interval"])
+    partial = ""
+    with path.open("r", encoding="utf-8") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, 1 << 20)
+            if chunk:
+                last_data = time.monotonic()
+                lines = (partial + chunk).split("\n")
+                partial = lines.pop()
+                await _put_lines(queue, stats, lines)
+                continue
+            if time.monotonic() - last_data > opts["idle_timeout"]:
+                break
+            await asyncio.sleep(opts["poll_interval"])
+    await _put_lines(queue, stats, [partial] if partial.strip() else [])
+
+async def _serve_socket(src, queue, stats, opts):
+    """Local TCP stand-in for a push feed; stops once idle with no open connections."""
+    state = {"open": 0, "last": time.monotonic()}
+
+    async def handle(reader, writer):
+        state["open"] += 1
+        try:
+            partial = b""
+            while True:
+                chunk = await reader.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                state["last"] = time.monotonic()
+                lines = (partial + chunk).split(b"\n")
+                partial = lines.pop()
+                await _put_lines(queue, stats, [l.decode("utf-8", errors="replace") for l in lines])
+            if partial.strip():
+                await _put_lines(queue, stats, [partial.decode("utf-8", errors="replace")])
+        finally:
+            state["open"] -= 1
+            state["last"] = time.monotonic()
+            writer.close()
+
+    server = await asyncio.start_server(handle, src["host"], src["port"])
+    port = server.sockets[0].getsockname()[1]
+    # report the bound port (differs from the requested one with port 0)
+    stats.name = f"socket:{src['host']}:{port}"
+    if src.get("on_ready"):
+        src["on_ready"](port)
+    async with server:
+        while state["open"] or time.monotonic() - state["last"] <= opts["idle_timeout"]:
+            await asyncio.sleep(opts["poll_interval"])
+
+_READERS = {"file": _read_file, "tail": _tail_file, "socket": _serve_socket}
+
+async def _consume(queue, aggregate):
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        stats, queued_at, lines = item
+        lag = time.monotonic() - queued_at
+        n, malformed = aggregate.add_lines(lines)
+        stats.skipped += malformed
+        stats.rows += n
+        stats.lag_total += lag * n
+        stats.lag_max = max(stats.lag_max, lag)
+        stats.consumed = time.monotonic()
+        # give producers a turn so one busy source cannot starve the others
+        await asyncio.sleep(0)
+
+async def ingest(sources, aggregate=None, queue_size=64, idle_timeout=2.0, poll_interval=0.05):
+    """Read all log sources concurrently into one LogAggregate.
+
+    Sources are dicts: {"kind": "file"|"tail", "path": ...} or
+    {"kind": "socket", "host": ..., "port": ...} (optional "on_ready" callback gets the
+    bound port, useful with port 0). Returns (aggregate, per-source report).
+    """
+    aggregate = aggregate if aggregate is not None else LogAggregate()
+    queue = asyncio.Queue(maxsize=queue_size)
+    opts = {"idle_timeout": idle_timeout, "poll_interval": poll_interval}
+    all_stats = [_SourceStats(_source_name(s), s["kind"]) for s in sources]
+
+    async def run_source(src, stats):
+        try:
+            await _READERS[src["kind"]](src, queue, stats, opts)
+        finally:
+            stats.finished = time.monotonic()
+
+    consumer = asyncio.create_task(_consume(queue, aggregate))
+    producers = [asyncio.create_task(run_source(s, st)) for s, st in zip(sources, all_stats)]
+    tasks = producers + [consumer]
+    try:
+        # watch the consumer alongside the producers (and the final sentinel put): if it
+        # dies, anything waiting on the full queue would otherwise block forever
+        pending, sentinel = set(tasks), None
+        while consumer in pending:
+            if sentinel is None and pending == {consumer}:
+                sentinel = asyncio.create_task(queue.put(None))
+                tasks.append(sentinel)
+                pending.add(sentinel)
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                t.result()  # re-raises a failed source or consumer
+            if consumer in done and sentinel is None:
+                raise RuntimeError("log consumer stopped before all sources finished")
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return aggregate, [st.report() for st in all_stats]
+
+def ingest_sources(sources, **kwargs):
+    return asyncio.run(ingest(sources, **kwargs))
@@ -2,18 +2,21 @@ import json
 import csv
 from pathlib import Path
 
+def clean_number(v):
+    """Whole numbers as int, otherwise rounded to drop float summation noise."""
+    return int(v) if abs(v - int(v)) < 1e-9 else round(v, 6)
+
 def read_json(path: Path):
     with path.open("r", encoding="utf-8") as f:
         return json.load(f)
 
-def write_json(path: Path, obj):
+def write_json(path: Path, obj, compact: bool = False):
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2, sort_keys=False)
-
-def read_csv_text(path: Path) -> str:
-    with path.open("r", encoding="utf-8") as f:
-        return f.read()
+        if compact:
+            json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+        else:
+            json.dump(obj, f, ensure_ascii=False, indent=2, sort_keys=False)
 
 def read_zones(path: Path):
     rows = []
@@ -1,15 +1,35 @@
 import argparse
+import json
+import sys
 from pathlib import Path
-from .io_utils import read_json, write_json, read_zones, read_csv_text
+from .io_utils import read_json, write_json, read_zones
 from .dedupe import clean_and_dedupe_orders
 from .plan import plan_orders
-from .reconcile import reconcile, parse_log_csv_text
+from .reconcile import reconcile_aggregate, LogAggregate
+from .ingest import ingest_sources, directory_sources
 
-def run(inputs_dir: Path, outputs_dir: Path):
+def _log_sources(inputs_dir: Path, log_dir=None, tails=(), listens=()):
+    """Extra log feeds: --log-dir (or inputs/logs/ when present), --tail files, --listen sockets."""
+    sources = []
+    log_dir = Path(log_dir) if log_dir else inputs_dir / "logs"
+    if log_dir.is_dir():
+        sources += directory_sources(log_dir)
+    sources += [{"kind": "tail", "path": Path(t)} for t in tails]
+    for hp in listens:
+        host, _, port = hp.rpartition(":")
+        sources.append({"kind": "socket", "host": host or "127.0.0.1", "port": int(port)})
+    return sources
+
+def run(inputs_dir: Path, outputs_dir: Path, log_dir=None, tails=(), listens=(),
+        idle_timeout: float = 2.0, queue_size: int = 64, ingest_report=None):
     orders = read_json(inputs_dir / "orders.json")
     couriers = read_json(inputs_dir / "couriers.json")
     zones_rows = read_zones(inputs_dir / "zones.csv")
-    log_text = read_csv_text(inputs_dir / "log.csv")
+    sources = _log_sources(inputs_dir, log_dir, tails, listens)
+    # log.csv is optional once per-courier feeds are supplied
+    log_path = inputs_dir / "log.csv"
+    if not (log_path.exists() or sources):
+        raise FileNotFoundError(log_path)
 
     # A) clean + dedupe
     clean_obj = clean_and_dedupe_orders(orders, zones_rows)
@@ -20,19 +40,35 @@ def run(inputs_dir: Path, outputs_dir: Path):
     write_json(outputs_dir / "plan.json", plan_obj)
 
     # C) reconcile
-    log_rows = parse_log_csv_text(log_text)
-    recon_obj = reconcile(clean_obj, plan_obj, log_rows, couriers, zones_rows)
+    # stream log.csv straight into the aggregate instead of materializing row dicts
+    log_agg = LogAggregate().add_file(log_path) if log_path.exists() else LogAggregate()
+    if sources:
+        log_agg, report = ingest_sources(sources, aggregate=log_agg,
+                                         queue_size=queue_size, idle_timeout=idle_timeout)
+        # timings vary run to run, so keep them out of the deterministic outputs folder
+        print(json.dumps(report, indent=2), file=sys.stderr)
+        if ingest_report:
+            write_json(Path(ingest_report), report)
+    recon_obj, stats_obj = reconcile_aggregate(clean_obj, plan_obj, log_agg, couriers, zones_rows)
     # Sort lists explicitly (determinism)
     for k in ["missing","unexpected","duplicate","late","misassigned","overloadedCouriers"]:
         recon_obj[k] = sorted(recon_obj[k])
     write_json(outputs_dir / "reconciliation.json", recon_obj)
+    write_json(outputs_dir / "reconciliation_stats.json", stats_obj, compact=True)
 
 def main():
     p = argparse.ArgumentParser(description="AI-Assisted Logistics Cleanup & Reconciliation")
     p.add_argument("--inputs", default="inputs", help="input folder containing orders.json, couriers.json, zones.csv, log.csv")
-    p.add_argument("--outputs", default="outputs", help="output folder for clean_orders.json, plan.json, reconciliation.json")
+    p.add_argument("--outputs", default="outputs", help="output folder for clean_orders.json, plan.json, reconciliation.json, reconciliation_stats.json")
+    p.add_argument("--log-dir", help="directory of per-courier log CSV files (default: <inputs>/logs if present)")
+    p.add_argument("--tail", action="append", default=[], help="growing log file to follow until idle (repeatable)")
+    p.add_argument("--listen", action="append", default=[], help="HOST:PORT to accept pushed log lines on (repeatable)")
+    p.add_argument("--idle-timeout", type=float, default=2.0, help="seconds without data before a tailed file or socket is done")
+    p.add_argument("--queue-size", type=int, default=64, help="max buffered batches before log sources are throttled")
+    p.add_argument("--ingest-report", help="also write per-source throughput/lag JSON to this path")
     args = p.parse_args()
-    run(Path(args.inputs), Path(args.outputs))
+    run(Path(args.inputs), Path(args.outputs), args.log_dir, args.tail, args.listen,
+        args.idle_timeout, args.queue_size, args.ingest_report)
 
 if __name__ == "__main__":
     main()
@@ -5,11 +5,20 @@ import difflib
 def _norm_token(s: str) -> str:
     return re.sub(r'[^a-z0-9]+', '', (s or '').lower())
 
+_ID_EDGES = re.compile(r'^[^A-Z0-9]+|[^A-Z0-9]+$')
+_ID_PARTS = re.compile(r'^([A-Z]+)[\s\-\._]*([0-9]+)$')
+
+# one-pass equivalent of the rules below for ASCII ids of the LETTERS-DIGITS shape
+_ID_FAST = re.compile(r'[^A-Za-z0-9]*([A-Za-z]+)[\s\-\._]*([0-9]+)[^A-Za-z0-9]*')
+
 def normalize_order_id(s: str) -> str:
+    if s and s.isascii():
+        m = _ID_FAST.fullmatch(s)
+        if m:
+            return f"{m.group(1).upper()}-{m.group(2)}"
     s = (s or "").strip().upper()
-    s = re.sub(r'^[^A-Z0-9]+', '', s)
-    s = re.sub(r'[^A-Z0-9]+$', '', s)
-    m = re.match(r'^([A-Z]+)[\s\-\._]*([0-9]+)$', s)
+    s = _ID_EDGES.sub('', s)
+    m = _ID_PARTS.match(s)
     if m:
         return f"{m.group(1)}-{m.group(2)}"
     return s
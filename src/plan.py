@@ -1,7 +1,9 @@
 # src/plan.py
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from .io_utils import clean_number
 from .normalize import build_zone_maps, canonicalize_zone
+from .slots import courier_windows, daily_capacity, build_slots, CourierSlots
 
 def _norm_couriers(couriers, zones_rows):
     norm_raw_map, canon_norms = build_zone_maps(zones_rows)
@@ -14,8 +16,9 @@ def _norm_couriers(couriers, zones_rows):
             "zonesCovered": zones,
             "acceptsCOD": bool(c.get("acceptsCOD")),
             "exclusions": [(e or "").strip().lower() for e in c.get("exclusions", [])],
-            "dailyCapacity": float(c.get("dailyCapacity", 0)),
-            "priority": int(c.get("priority", 999))
+            "dailyCapacity": daily_capacity(c),
+            "priority": int(c.get("priority", 999)),
+            "windows": courier_windows(c)
         })
     return res
 
@@ -32,22 +35,43 @@ def _ok_constraints(c, order):
 def _parse_dl(s):
     return datetime.strptime(s, "%Y-%m-%d %H:%M") if s else datetime.max
 
+def _planning_days(clean_orders):
+    """Deadline dates (first to last) plus the day before, whose overnight windows reach into the first day."""
+    dates = sorted({_parse_dl(o["deadline"]).date() for o in clean_orders if o["deadline"]})
+    if not dates:
+        return [], None
+    days = [dates[0] + timedelta(days=i) for i in range(-1, (dates[-1] - dates[0]).days + 1)]
+    return days, datetime(dates[0].year, dates[0].month, dates[0].day)
+
 def plan_orders(clean_orders_obj, couriers, zones_rows):
     clean_orders = clean_orders_obj["orders"]
     couriers_n = _norm_couriers(couriers, zones_rows)
     loads = {c["courierId"]: 0.0 for c in couriers_n}
 
+    # Optional time-slotted capacity: couriers with `shifts`/`hourlyCapacity` also need room in
+    # slots starting at or before the order's deadline (on top of dailyCapacity). Without any
+    # deadline there is no horizon to lay slots on, so they fall back to dailyCapacity only.
+    days, horizon_start = _planning_days(clean_orders)
+    slotted = {c["courierId"]: CourierSlots(build_slots(c["windows"], days, horizon_start))
+               for c in couriers_n if c["windows"] is not None and days}
+
     # Deterministic order: earliest deadline, then orderId (this satisfies the "tightest deadline" tie-break)
     orders_sorted = sorted(clean_orders, key=lambda o: (_parse_dl(o["deadline"]), o["orderId"]))
 
     assignments, unassigned = [], []
     for o in orders_sorted:
         w = float(o["weight"] or 0)
-        candidates = []
+        dl = _parse_dl(o["deadline"]) if o["deadline"] else None
+        candidates, slot_for = [], {}
         for c in couriers_n:
             if _covers(c, o) and _ok_constraints(c, o):
                 # ENFORCE CAPACITY HERE
                 if loads[c["courierId"]] + w <= c["dailyCapacity"] + 1e-9:
+                    if c["courierId"] in slotted:
+                        alloc = slotted[c["courierId"]].find(dl, w)
+                        if alloc is None:
+                            continue
+                        slot_for[c["courierId"]] = alloc
                     candidates.append(c)
 
         if not candidates:
@@ -61,9 +85,20 @@ def plan_orders(clean_orders_obj, couriers, zones_rows):
         chosen = candidates[0]
         assignments.append({"orderId": o["orderId"], "courierId": chosen["courierId"]})
         loads[chosen["courierId"]] += w
+        if chosen["courierId"] in slot_for:
+            slotted[chosen["courierId"]].take(slot_for[chosen["courierId"]])
 
-    cap_usage = [{"courierId": k, "totalWeight": (int(v) if abs(v - int(v)) < 1e-9 else v)}
-                 for k, v in sorted(loads.items())]
+    cap_usage = []
+    for k, v in sorted(loads.items()):
+        entry = {"courierId": k, "totalWeight": clean_number(v)}
+        if k in slotted:
+            cs = slotted[k]
+            entry["slots"] = [{"start": s[0].strftime("%Y-%m-%d %H:%M"),
+                               "end": s[1].strftime("%Y-%m-%d %H:%M"),
+                               "capacity": clean_number(s[2]),
+                               "usedWeight": clean_number(u)}
+                              for s, u in zip(cs.slots, cs.used) if u > 1e-9]
+        cap_usage.append(entry)
 
     return {
         "assignments": sorted(assignments, key=lambda x: x["orderId"]),
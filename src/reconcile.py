@@ -1,5 +1,9 @@
+import math
+from bisect import bisect_right
 from collections import defaultdict
+from .io_utils import clean_number
 from .normalize import normalize_order_id, parse_deadline, build_zone_maps, canonicalize_zone
+from .slots import daily_capacity
 
 def _norm_couriers(couriers, zones_rows):
     norm_raw_map, canon_norms = build_zone_maps(zones_rows)
@@ -12,7 +16,7 @@ def _norm_couriers(couriers, zones_rows):
             "zonesCovered": zones,
             "acceptsCOD": bool(c.get("acceptsCOD")),
             "exclusions": [ (e or "").strip().lower() for e in c.get("exclusions",[]) ],
-            "dailyCapacity": float(c.get("dailyCapacity",0)),
+            "dailyCapacity": daily_capacity(c),
             "priority": int(c.get("priority", 999))
         })
     return res
@@ -27,18 +31,183 @@ def _ok_constraints(c, order):
         return False
     return True
 
+def parse_log_line(line: str):
+    parts = [p.strip() for p in line.split(",")]
+    if len(parts) != 3:
+        return None
+    if parts[0].lower() == "orderid":
+        return None
+    return {"orderId": parts[0], "courierId": parts[1], "deliveredAt": parts[2]}
+
 def parse_log_csv_text(text: str):
+    """Row dicts for in-memory callers of reconcile(); the CLI streams log files via LogAggregate.add_file."""
     rows = []
     for line in (text or "").strip().splitlines():
-        parts = [p.strip() for p in line.split(",")]
-        if len(parts) != 3:
-            continue
-        if parts[0].lower() == "orderid":
-            continue
-        rows.append({"orderId": parts[0], "courierId": parts[1], "deliveredAt": parts[2]})
+        row = parse_log_line(line)
+        if row is not None:
+            rows.append(row)
     return rows
 
+_ID_CACHE_MAX = 1 << 16
+
+class LogAggregate:
+    """Incremental log state: per normalized order, [scan count, earliest deliveredAt, its courierUpper].
+
+    Lines can be streamed in (add_lines/add_file) or added as they arrive (see src/ingest.py).
+    A parseable scan time always beats an unparseable one and equal times keep the
+    lexicographically smaller courier, so arrival order does not matter.
+    """
+
+    def __init__(self):
+        self.scans = {}
+        # couriers and minute-resolution timestamps repeat heavily across scans, so each
+        # distinct raw value is normalized/parsed once; raw order ids mostly repeat only for
+        # nearby duplicate scans, so that cache is bounded
+        self._parsed_ts = {}
+        self._ids = {}
+        self._couriers = {}
+
+    def ts(self, s):
+        try:
+            return self._parsed_ts[s]
+        except KeyError:
+            v = self._parsed_ts[s] = parse_deadline(s)
+            return v
+
+    def add_fields(self, rows):
+        """Fold raw (orderId, courierId, deliveredAt) rows in, skipping a header row; returns rows added."""
+        scans, ids, couriers, parsed_ts = self.scans, self._ids, self._couriers, self._parsed_ts
+        added = 0
+        for raw_id, raw_c, raw_ts in rows:
+            oid = ids.get(raw_id)
+            if oid is None:
+                if len(ids) >= _ID_CACHE_MAX:
+                    ids.clear()
+                oid = ids[raw_id] = normalize_order_id(raw_id)
+            if oid == "ORDERID":
+                continue
+            cu = couriers.get(raw_c)
+            if cu is None:
+                cu = couriers[raw_c] = (raw_c or "").strip().upper()
+            if raw_ts in parsed_ts:
+                at = parsed_ts[raw_ts]
+            else:
+                at = parsed_ts[raw_ts] = parse_deadline(raw_ts)
+            cur = scans.get(oid)
+            if cur is None:
+                scans[oid] = [1, at, cu]
+                added += 1
+                continue
+            cur[0] += 1
+            # total order (unparseable last, then time, then courier) keeps the result
+            # independent of arrival order
+            prev = cur[1]
+            if at is None:
+                if prev is None and cu < cur[2]:
+                    cur[2] = cu
+            elif prev is None or at < prev or (at == prev and cu < cur[2]):
+                cur[1] = at
+                cur[2] = cu
+            added += 1
+        return added
+
+    def add_lines(self, lines):
+        """Fold raw `orderId,courierId,deliveredAt` lines in; returns (scans added, malformed lines).
+
+        Blank lines and a header line are neither.
+        """
+        rows, malformed = [], 0
+        for line in lines:
+            parts = line.split(",")
+            if len(parts) == 3:
+                rows.append(parts)
+            elif line.strip():
+                malformed += 1
+        return self.add_fields(rows), malformed
+
+    def add_file(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            while True:
+                lines = f.readlines(1 << 20)
+                if not lines:
+                    return self
+                self.add_lines(lines)
+
+def _percentile(sorted_vals, q):
+    # nearest-rank percentile over an already sorted sequence
+    if not sorted_vals:
+        return None
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(q / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+class _StatsAccumulator:
+    """Per-courier delivery counters, indexed by courier slot and updated in the reconcile loop."""
+
+    def __init__(self):
+        self.index = {}
+        self.ids = []
+        self.delivered = []
+        self.weight = []
+        self.hourly = []
+        self.lateness = []      # signed minutes, only for orders with a deadline
+
+    def courier_slot(self, courier_id):
+        i = self.index.get(courier_id)
+        if i is None:
+            i = self.index[courier_id] = len(self.ids)
+            self.ids.append(courier_id)
+            self.delivered.append(0)
+            self.weight.append(0.0)
+            self.hourly.append([0] * 24)
+            self.lateness.append([])
+        return i
+
+    def _entry(self, delivered, weight, lateness, hourly):
+        lateness = sorted(lateness)
+        late = len(lateness) - bisect_right(lateness, 0)
+        return {
+            "delivered": delivered,
+            "weight": clean_number(weight),
+            "late": late,
+            "onTimeRate": round(1 - late / len(lateness), 4) if lateness else None,
+            "latenessMinutes": {
+                "p50": _percentile(lateness, 50),
+                "p90": _percentile(lateness, 90),
+                "p99": _percentile(lateness, 99),
+                "max": lateness[-1] if lateness else None
+            },
+            "hourly": hourly
+        }
+
+    def result(self):
+        per_courier = []
+        for i in sorted(range(len(self.ids)), key=lambda j: self.ids[j]):
+            entry = {"courierId": self.ids[i]}
+            entry.update(self._entry(self.delivered[i], self.weight[i], self.lateness[i],
+                                     self.hourly[i]))
+            per_courier.append(entry)
+        return {
+            "couriers": per_courier,
+            "total": self._entry(sum(self.delivered), math.fsum(self.weight),
+                                 [m for ls in self.lateness for m in ls],
+                                 [sum(col) for col in zip(*self.hourly)] if self.hourly else [0] * 24)
+        }
+
 def reconcile(clean_orders_obj, plan_obj, log_rows, couriers, zones_rows):
+    return reconcile_with_stats(clean_orders_obj, plan_obj, log_rows, couriers, zones_rows)[0]
+
+def reconcile_with_stats(clean_orders_obj, plan_obj, log_rows, couriers, zones_rows):
+    """Like reconcile(), plus per-courier delivery analytics gathered in the same pass.
+
+    Stats cover unique delivered orders (earliest scan) that exist in clean orders;
+    latenessMinutes is signed (negative = early), hourly is by delivery hour 0-23.
+    """
+    agg = LogAggregate()
+    agg.add_fields((r["orderId"], r["courierId"], r["deliveredAt"]) for r in log_rows)
+    return reconcile_aggregate(clean_orders_obj, plan_obj, agg, couriers, zones_rows)
+
+def reconcile_aggregate(clean_orders_obj, plan_obj, log_agg, couriers, zones_rows):
+    """reconcile_with_stats() over an already filled LogAggregate."""
     orders = clean_orders_obj["orders"]
     orders_by_id = {o["orderId"]: o for o in orders}
     planned = {a["orderId"]: a["courierId"] for a in plan_obj["assignments"]}
@@ -47,68 +216,62 @@ def reconcile(clean_orders_obj, plan_obj, log_rows, couriers, zones_rows):
     courier_by_upper = {c["courierUpper"]: c for c in couriers_n}
     courier_caps = {c["courierUpper"]: c["dailyCapacity"] for c in couriers_n}
 
-    # feasible couriers per order (used for relaxed misassignment logic)
-    feasible = {}
-    for o in orders:
-        feas = []
-        for c in couriers_n:
-            if _covers(c, o) and _ok_constraints(c, o):
-                feas.append(c["courierId"])
-        feasible[o["orderId"]] = sorted(feas)
-
-    # normalize logs; keep earliest scan per order for lateness/weight
-    logs = []
-    for r in log_rows:
-        oid = normalize_order_id(r["orderId"])
-        cid_upper = (r["courierId"] or "").strip().upper()
-        delivered_at = parse_deadline(r["deliveredAt"])
-        logs.append({"orderId": oid, "courierUpper": cid_upper, "deliveredAt": delivered_at})
-
-    seen = defaultdict(int)
-    actual_by_order = {}
-    for l in logs:
-        seen[l["orderId"]] += 1
-        if l["orderId"] not in actual_by_order or (l["deliveredAt"] and actual_by_order[l["orderId"]]["deliveredAt"] and l["deliveredAt"] < actual_by_order[l["orderId"]]["deliveredAt"]):
-            actual_by_order[l["orderId"]] = l
-
-    planned_ids = set(planned)
-    log_ids = set(actual_by_order)
-    clean_ids = set(orders_by_id)
-
-    missing = sorted([oid for oid in planned_ids if oid not in log_ids])
-    unexpected = sorted([oid for oid in log_ids if oid not in clean_ids])
-    duplicate = sorted([oid for oid, cnt in seen.items() if cnt > 1])
-
-    late = []
-    for oid, l in actual_by_order.items():
-        if oid in orders_by_id:
-            dl = parse_deadline(orders_by_id[oid]["deadline"])
-            if dl and l["deliveredAt"] and l["deliveredAt"] > dl:
-                late.append(oid)
-    late = sorted(late)
+    # feasible couriers (used for relaxed misassignment logic), computed lazily per
+    # distinct order profile since many orders share city/zone/payment/product
+    feasible_by_profile = {}
+    def _feasible(o):
+        key = (o["city"], o["zoneHint"], o["paymentType"], o["productType"])
+        if key not in feasible_by_profile:
+            feasible_by_profile[key] = sorted(c["courierId"] for c in couriers_n
+                                              if _covers(c, o) and _ok_constraints(c, o))
+        return feasible_by_profile[key]
+
+    scans = log_agg.scans
+    _ts = log_agg.ts
+
+    missing = sorted([oid for oid in planned if oid not in scans])
+    unexpected = sorted([oid for oid in scans if oid not in orders_by_id])
+    duplicate = sorted([oid for oid, sc in scans.items() if sc[0] > 1])
 
-    # relaxed misassignment rule to match spec notes:
-    # flag if delivered by an infeasible courier, OR delivered by a different courier when the planned courier was the only feasible option.
-    misassigned = []
-    for oid, l in actual_by_order.items():
-        if oid in orders_by_id and oid in planned:
-            feas = feasible.get(oid, [])
-            logged_c = courier_by_upper.get(l["courierUpper"])
-            logged_ok = bool(logged_c and logged_c["courierId"] in feas)
-            if not logged_ok:
+    # one pass over delivered orders (earliest scan) for lateness, misassignment, overload and stats
+    late, misassigned = [], []
+    stats = _StatsAccumulator()
+    st_slot, st_delivered, st_weight = {}, stats.delivered, stats.weight
+    st_hourly, st_lateness = stats.hourly, stats.lateness
+    delivered_weight_by_upper = defaultdict(float)
+    for oid, (_, delivered_at, cupper) in scans.items():
+        o = orders_by_id.get(oid)
+        if o is None:
+            continue
+        dl = _ts(o["deadline"])
+        weight = float(o["weight"] or 0.0)
+        logged_c = courier_by_upper.get(cupper)
+        ci = st_slot.get(cupper)
+        if ci is None:
+            ci = st_slot[cupper] = stats.courier_slot(logged_c["courierId"] if logged_c else cupper)
+        st_delivered[ci] += 1
+        st_weight[ci] += weight
+        if delivered_at:
+            st_hourly[ci][delivered_at.hour] += 1
+            if dl:
+                if delivered_at > dl:
+                    late.append(oid)
+                st_lateness[ci].append(int((delivered_at - dl).total_seconds() // 60))
+        if logged_c:
+            delivered_weight_by_upper[cupper] += weight
+
+        # relaxed misassignment rule to match spec notes:
+        # flag if delivered by an infeasible courier, OR delivered by a different courier when the planned courier was the only feasible option.
+        if oid in planned:
+            feas = _feasible(o)
+            if not (logged_c and logged_c["courierId"] in feas):
                 misassigned.append(oid)
-            else:
-                planned_cid = planned[oid]
-                if len(feas) == 1 and planned_cid.upper() != l["courierUpper"]:
-                    misassigned.append(oid)
+            elif len(feas) == 1 and planned[oid].upper() != cupper:
+                misassigned.append(oid)
+    late = sorted(late)
     misassigned = sorted(set(misassigned))
 
     # overloaded by actual delivered (unique orders)
-    delivered_weight_by_upper = defaultdict(float)
-    for oid, l in actual_by_order.items():
-        if oid in orders_by_id and l["courierUpper"] in courier_by_upper:
-            delivered_weight_by_upper[l["courierUpper"]] += float(orders_by_id[oid]["weight"] or 0.0)
-
     overloaded = []
     for cupper, tot in delivered_weight_by_upper.items():
         cap = courier_caps.get(cupper, float("inf"))
@@ -123,4 +286,4 @@ def reconcile(clean_orders_obj, plan_obj, log_rows, couriers, zones_rows):
         "late": late,
         "misassigned": misassigned,
         "overloadedCouriers": overloaded
-    }
+    }, stats.result()
@@ -0,0 +1,165 @@
+# src/slots.py
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+# remaining room at or below this counts as empty
+_EPS = 1e-9
+
+class SlotTree:
+    """Segment tree over remaining capacity per slot, keeping both max and sum per node.
+
+    `first_fit(lo, hi, w)` returns the earliest slot index in [lo, hi) with at least `w`
+    remaining (or -1) and `room(hi)` the total remaining in [0, hi), both in O(log n),
+    so per-courier lookups stay cheap at 100k+ orders.
+    """
+
+    def __init__(self, capacities):
+        self.n = len(capacities)
+        size = 1
+        while size < max(self.n, 1):
+            size *= 2
+        self.size = size
+        self.tree = [float("-inf")] * (2 * size)
+        self.sums = [0.0] * (2 * size)
+        for i, cap in enumerate(capacities):
+            self.tree[size + i] = self.sums[size + i] = float(cap)
+        for i in range(size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+            self.sums[i] = self.sums[2 * i] + self.sums[2 * i + 1]
+
+    def _nodes(self, lo, hi):
+        # canonical nodes covering [lo, hi), left to right
+        lefts, rights = [], []
+        l, r = self.size + lo, self.size + hi
+        while l < r:
+            if l & 1:
+                lefts.append(l)
+                l += 1
+            if r & 1:
+                r -= 1
+                rights.append(r)
+            l //= 2
+            r //= 2
+        return lefts + rights[::-1]
+
+    def remaining(self, i):
+        return self.sums[self.size + i]
+
+    def room(self, hi):
+        return sum(self.sums[node] for node in self._nodes(0, min(hi, self.n)))
+
+    def first_fit(self, lo, hi, w):
+        hi = min(hi, self.n)
+        tree, need = self.tree, w - _EPS
+        if lo >= hi or tree[1] < need:
+            return -1
+        for node in self._nodes(lo, hi):
+            if tree[node] >= need:
+                while node < self.size:
+                    node = 2 * node if tree[2 * node] >= need else 2 * node + 1
+                return node - self.size
+        return -1
+
+    def consume(self, i, w):
+        node = self.size + i
+        self.tree[node] -= w
+        self.sums[node] -= w
+        node //= 2
+        while node:
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+            self.sums[node] = self.sums[2 * node] + self.sums[2 * node + 1]
+            node //= 2
+
+def _parse_hm(s):
+    t = datetime.strptime((s or "").strip(), "%H:%M")
+    return timedelta(hours=t.hour, minutes=t.minute)
+
+def courier_windows(c):
+    """Per-day (start, end, capacity) windows from a raw courier record, or None if not slotted.
+
+    `shifts` (list of {"start","end","capacity"}) wins over `hourlyCapacity`, which is
+    split into one-hour slots across `workingHours` (default the whole day).
+    A window whose end is not after its start runs past midnight.
+    """
+    shifts = c.get("shifts")
+    if shifts:
+        res = []
+        for s in shifts:
+            start, end = _parse_hm(s["start"]), _parse_hm(s["end"])
+            if end <= start:
+                end += timedelta(days=1)
+            res.append((start, end, float(s.get("capacity", 0))))
+        return sorted(res)
+    if c.get("hourlyCapacity") is not None:
+        cap = float(c["hourlyCapacity"])
+        wh = c.get("workingHours") or {"start": "00:00", "end": "00:00"}
+        start, end = _parse_hm(wh["start"]), _parse_hm(wh["end"])
+        if end <= start:
+            end += timedelta(days=1)
+        res = []
+        while start < end:
+            res.append((start, min(start + timedelta(hours=1), end), cap))
+            start += timedelta(hours=1)
+        return res
+    return None
+
+def daily_capacity(c):
+    """`dailyCapacity` of a raw courier record; slotted couriers without one are capped by their slots only."""
+    if c.get("dailyCapacity") is not None:
+        return float(c["dailyCapacity"])
+    return float("inf") if courier_windows(c) is not None else 0.0
+
+def build_slots(windows, days, not_before=None):
+    """Expand per-day windows over the planning days -> sorted (start, end, capacity) slots.
+
+    Slots ending at or before `not_before` are dropped; this keeps only the overnight tail
+    of windows that start on the day before the horizon.
+    """
+    slots = []
+    for d in days:
+        base = datetime(d.year, d.month, d.day)
+        for start, end, cap in windows:
+            if not_before is None or base + end > not_before:
+                slots.append((base + start, base + end, cap))
+    slots.sort()
+    return slots
+
+class CourierSlots:
+    """Slotted capacity state for one courier: slot bounds plus a SlotTree of remaining room."""
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.starts = [s[0] for s in slots]
+        self.tree = SlotTree([s[2] for s in slots])
+        self.used = [0.0] * len(slots)
+
+    def find(self, deadline, w):
+        """Allocation [(slot index, weight), ...] for `w` among slots starting at or before
+        `deadline` (None = any), or None if they lack room.
+
+        Prefers the earliest single slot that fits; otherwise `w` is spread over the
+        earliest slots with room left.
+        """
+        hi = len(self.slots) if deadline is None else bisect_right(self.starts, deadline)
+        i = self.tree.first_fit(0, hi, w)
+        if i >= 0:
+            return [(i, w)]
+        if self.tree.room(hi) < w - _EPS:
+            return None
+        alloc, left, i = [], w, 0
+        while left > _EPS:
+            # next slot with more than _EPS left (first_fit subtracts _EPS from the request)
+            i = self.tree.first_fit(i, hi, 2 * _EPS)
+            if i < 0:
+                return None
+            part = min(self.tree.remaining(i), left)
+            alloc.append((i, part))
+            left -= part
+            i += 1
+        return alloc
+
+    def take(self, alloc):
+        for i, w in alloc:
+            self.tree.consume(i, w)
+            self.used[i] += w